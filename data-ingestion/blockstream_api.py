@@ -1,9 +1,15 @@
 import requests
 import os
 import logging
-import json
 import io
+import time
+import threading
+import orjson
+import zstandard
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from minio import Minio
 from minio.error import S3Error
 from dotenv import load_dotenv
@@ -25,6 +31,39 @@ MINIO_ENDPOINT = os.getenv('MINIO_EXTERNAL_URL')
 MINIO_ACCESS_KEY = os.getenv('MINIO_ACCESS_KEY')
 MINIO_SECRET_KEY = os.getenv('MINIO_SECRET_KEY')
 MINIO_BUCKET = os.getenv('MINIO_BUCKET_NAME')
+MINIO_PART_SIZE_MB = int(os.getenv('MINIO_PART_SIZE_MB', '32'))
+if not 5 <= MINIO_PART_SIZE_MB <= 5 * 1024:
+    logger.error(f"MINIO_PART_SIZE_MB must be between 5 and 5120, got {MINIO_PART_SIZE_MB}")
+    raise ValueError(f"MINIO_PART_SIZE_MB must be between 5 and 5120, got {MINIO_PART_SIZE_MB}")
+MINIO_PART_SIZE = MINIO_PART_SIZE_MB * 1024 * 1024
+MINIO_COMPRESSION = os.getenv('MINIO_COMPRESSION', 'none').lower()
+ZSTD_LEVEL = int(os.getenv('ZSTD_LEVEL', '3'))
+
+HTTP_TIMEOUT = (3.05, 30)
+MAX_WORKERS = int(os.getenv('BLOCKSTREAM_MAX_WORKERS', '16'))
+TOKEN_EXPIRY_MARGIN_SECONDS = 30
+MEMPOOL_TXIDS_MAX_ITEMS = 10000
+MEMPOOL_TXIDS_MAX_BYTES = MEMPOOL_TXIDS_MAX_ITEMS * 67
+
+_TOKEN_CACHE = {'value': None, 'expires_at': 0}
+_TOKEN_LOCK = threading.Lock()
+_ZSTD_LOCAL = threading.local()
+_MINIO_CLIENT = None
+_MINIO_LOCK = threading.Lock()
+
+def create_session():
+    session = requests.Session()
+    retries = Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=[429, 500, 502, 503, 504]
+    )
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=32, max_retries=retries)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+SESSION = create_session()
 
 def validate_credentials():
     if not CLIENT_ID:
@@ -63,20 +102,45 @@ def initialize_minio():
         logger.error(f"MinIO initialization error: {e}")
         raise
 
+def get_zstd_compressor():
+    if not hasattr(_ZSTD_LOCAL, 'compressor'):
+        _ZSTD_LOCAL.compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+    return _ZSTD_LOCAL.compressor
+
+def get_minio_client():
+    global _MINIO_CLIENT
+    if _MINIO_CLIENT is None:
+        with _MINIO_LOCK:
+            if _MINIO_CLIENT is None:
+                _MINIO_CLIENT = initialize_minio()
+    return _MINIO_CLIENT
+
 def save_to_minio(data, object_name, minio_client=None):
     if minio_client is None:
-        minio_client = initialize_minio()
+        minio_client = get_minio_client()
     
     try:
-        json_data = json.dumps(data, indent=2, default=str)
-        json_bytes = json_data.encode('utf-8')
+        if isinstance(data, bytes):
+            json_bytes = data
+        else:
+            json_bytes = orjson.dumps(data, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        
+        content_type = 'application/json'
+        metadata = None
+        if MINIO_COMPRESSION == 'zstd':
+            json_bytes = get_zstd_compressor().compress(json_bytes)
+            object_name = f"{object_name}.zst"
+            content_type = 'application/zstd'
+            metadata = {'X-Amz-Meta-Content-Encoding': 'zstd'}
         
         minio_client.put_object(
             MINIO_BUCKET,
             object_name,
             data=io.BytesIO(json_bytes), 
             length=len(json_bytes),
-            content_type='application/json'
+            content_type=content_type,
+            metadata=metadata,
+            part_size=MINIO_PART_SIZE
         )
         
         logger.info(f"Successfully saved data to MinIO: {object_name}")
@@ -89,49 +153,77 @@ def save_to_minio(data, object_name, minio_client=None):
         logger.error(f"Error saving to MinIO: {e}")
         return False
 
-def authenticate():
-    validate_credentials()
-    
-    logger.info("Starting authentication process")
-    
-    payload = {
-        'grant_type': 'client_credentials',
-        'client_id': CLIENT_ID,
-        'client_secret': CLIENT_SECRET
-    }
+def save_many_to_minio(uploads, minio_client):
+    if not uploads:
+        return []
     
-    try:
-        response = requests.post(TOKEN_URL, data=payload)
-        response.raise_for_status()
-        access_token = response.json().get('access_token')
-        
-        if access_token:
-            logger.info("Authentication successful")
-            return access_token
-        else:
-            raise ValueError("No access token received")
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Authentication failed: {e}")
-        raise
+    logger.info(f"Saving {len(uploads)} objects to MinIO concurrently")
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(uploads))) as executor:
+        return list(executor.map(lambda upload: save_to_minio(upload[0], upload[1], minio_client), uploads))
+
+def token_expired():
+    return time.time() >= _TOKEN_CACHE['expires_at'] - TOKEN_EXPIRY_MARGIN_SECONDS
 
-def get_headers(access_token):
-    if not access_token:
+def authenticate():
+    with _TOKEN_LOCK:
+        if _TOKEN_CACHE['value'] and not token_expired():
+            logger.debug("Reusing cached access token")
+            return _TOKEN_CACHE['value']
+        
+        validate_credentials()
+        
+        logger.info("Starting authentication process")
+        
+        payload = {
+            'grant_type': 'client_credentials',
+            'client_id': CLIENT_ID,
+            'client_secret': CLIENT_SECRET
+        }
+        
+        try:
+            response = SESSION.post(TOKEN_URL, data=payload, headers={'Authorization': None}, timeout=HTTP_TIMEOUT)
+            response.raise_for_status()
+            token_data = response.json()
+            access_token = token_data.get('access_token')
+            
+            if access_token:
+                _TOKEN_CACHE['value'] = access_token
+                _TOKEN_CACHE['expires_at'] = time.time() + float(token_data.get('expires_in', 3600))
+                set_session_token(access_token)
+                logger.info("Authentication successful")
+                return access_token
+            else:
+                raise ValueError("No access token received")
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Authentication failed: {e}")
+            raise
+
+def set_session_token(access_token):
+    SESSION.headers['Authorization'] = f'Bearer {access_token}'
+
+def get_request_headers(access_token):
+    if access_token and access_token != _TOKEN_CACHE['value']:
+        return {'Authorization': f'Bearer {access_token}'}
+    if not _TOKEN_CACHE['value']:
         raise ValueError("Access token is required")
-    return {'Authorization': f'Bearer {access_token}'}
+    if token_expired():
+        logger.info("Access token expired, re-authenticating")
+        authenticate()
+    return None
 
 def fetch_data(endpoint, access_token):
     logger.info(f"Fetching data from endpoint: {endpoint}")
     
     try:
-        headers = get_headers(access_token)
+        headers = get_request_headers(access_token)
         logger.debug(f"Making request to {endpoint}")
-        response = requests.get(endpoint, headers=headers)
+        response = SESSION.get(endpoint, headers=headers, timeout=HTTP_TIMEOUT)
         response.raise_for_status()
         
         content_type = response.headers.get('content-type', '').lower()
         
         if 'application/json' in content_type:
-            data = response.json()
+            data = orjson.loads(response.content)
             logger.info(f"Successfully fetched JSON data from {endpoint}")
         else:
             data = response.text.strip()
@@ -149,19 +241,57 @@ def fetch_data(endpoint, access_token):
     except requests.exceptions.RequestException as e:
         logger.error(f"Failed to fetch data from {endpoint}: {e}")
         raise
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         logger.error(f"Failed to parse JSON from {endpoint}: {e}")
         return response.text.strip()
 
-def get_mempool_info(access_token):
+def fetch_raw(endpoint, access_token):
+    logger.info(f"Fetching raw data from endpoint: {endpoint}")
+    
+    try:
+        headers = get_request_headers(access_token)
+        logger.debug(f"Making request to {endpoint}")
+        response = SESSION.get(endpoint, headers=headers, timeout=HTTP_TIMEOUT)
+        response.raise_for_status()
+        
+        logger.info(f"Successfully fetched {len(response.content)} bytes from {endpoint}")
+        return response.content
+        
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Failed to fetch data from {endpoint}: {e}")
+        raise
+
+def fetch_size(endpoint, access_token):
+    logger.debug(f"Checking response size for endpoint: {endpoint}")
+    
+    try:
+        headers = {'Accept-Encoding': 'identity'}
+        headers.update(get_request_headers(access_token) or {})
+        response = SESSION.head(endpoint, headers=headers, timeout=HTTP_TIMEOUT)
+        response.raise_for_status()
+        content_length = response.headers.get('content-length')
+        return int(content_length) if content_length else None
+    except (requests.exceptions.RequestException, ValueError) as e:
+        logger.debug(f"Could not determine response size for {endpoint}: {e}")
+        return None
+
+def fetch_many(getters, access_token):
+    if not getters:
+        return []
+    
+    logger.info(f"Fetching {len(getters)} endpoints concurrently")
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(getters))) as executor:
+        return list(executor.map(lambda getter: getter(access_token), getters))
+
+def get_mempool_info(access_token, raw=False):
     logger.info("Fetching mempool information")
     endpoint = f"{BASE_URL}/mempool"
-    return fetch_data(endpoint, access_token)
+    return fetch_raw(endpoint, access_token) if raw else fetch_data(endpoint, access_token)
 
-def get_fee_estimates(access_token):
+def get_fee_estimates(access_token, raw=False):
     logger.info("Fetching fee estimates")
     endpoint = f"{BASE_URL}/fee-estimates"
-    return fetch_data(endpoint, access_token)
+    return fetch_raw(endpoint, access_token) if raw else fetch_data(endpoint, access_token)
 
 def get_blocks_tip_height(access_token):
     logger.info("Fetching current block height")
@@ -192,30 +322,35 @@ def get_block_by_height(height, access_token):
     endpoint = f"{BASE_URL}/block-height/{height}"
     return fetch_data(endpoint, access_token)
 
-def get_mempool_txids(access_token):
+def get_mempool_txids(access_token, max_bytes=None):
     logger.info("Fetching mempool transaction IDs")
     endpoint = f"{BASE_URL}/mempool/txids"
+    if max_bytes is not None:
+        size = fetch_size(endpoint, access_token)
+        if size is not None and size > max_bytes:
+            logger.info(f"Skipping mempool txids - too large ({size} bytes)")
+            return None
     return fetch_data(endpoint, access_token)
 
-def get_mempool_recent(access_token):
+def get_mempool_recent(access_token, raw=False):
     logger.info("Fetching recent mempool transactions")
     endpoint = f"{BASE_URL}/mempool/recent"
-    return fetch_data(endpoint, access_token)
+    return fetch_raw(endpoint, access_token) if raw else fetch_data(endpoint, access_token)
 
 def get_block_header(block_hash, access_token):
     logger.info(f"Fetching block header for hash: {block_hash}")
     endpoint = f"{BASE_URL}/block/{block_hash}/header"
     return fetch_data(endpoint, access_token)
 
-def get_block_status(block_hash, access_token):
+def get_block_status(block_hash, access_token, raw=False):
     logger.info(f"Fetching block status for hash: {block_hash}")
     endpoint = f"{BASE_URL}/block/{block_hash}/status"
-    return fetch_data(endpoint, access_token)
+    return fetch_raw(endpoint, access_token) if raw else fetch_data(endpoint, access_token)
 
-def get_block_txs(block_hash, access_token, start_index=0):
+def get_block_txs(block_hash, access_token, start_index=0, raw=False):
     logger.info(f"Fetching transactions for block: {block_hash}, starting at index: {start_index}")
     endpoint = f"{BASE_URL}/block/{block_hash}/txs/{start_index}" if start_index > 0 else f"{BASE_URL}/block/{block_hash}/txs"
-    return fetch_data(endpoint, access_token)
+    return fetch_raw(endpoint, access_token) if raw else fetch_data(endpoint, access_token)
 
 def get_block_txids(block_hash, access_token):
     logger.info(f"Fetching transaction IDs for block: {block_hash}")
@@ -235,20 +370,18 @@ def get_transaction_status(txid, access_token):
 def get_network_stats(access_token):
     logger.info("Fetching comprehensive network statistics")
     
-    stats = {}
+    getters = {
+        'mempool': get_mempool_info,
+        'fee_estimates': get_fee_estimates,
+        'current_height': get_blocks_tip_height,
+        'current_hash': get_blocks_tip_hash,
+        'recent_blocks': get_recent_blocks,
+        'recent_mempool_txs': get_mempool_recent
+    }
     
     try:
-        stats['mempool'] = get_mempool_info(access_token)
-        
-        stats['fee_estimates'] = get_fee_estimates(access_token)
-
-        stats['current_height'] = get_blocks_tip_height(access_token)
-        
-        stats['current_hash'] = get_blocks_tip_hash(access_token)
-   
-        stats['recent_blocks'] = get_recent_blocks(access_token)
-
-        stats['recent_mempool_txs'] = get_mempool_recent(access_token)
+        results = fetch_many(list(getters.values()), access_token)
+        stats = dict(zip(getters.keys(), results))
         
         logger.info("Successfully compiled network statistics")
         return stats
@@ -260,75 +393,101 @@ def get_network_stats(access_token):
     
 def collect_and_store_blockstream_data(access_token, minio_client=None):
     if minio_client is None:
-        minio_client = initialize_minio()
+        minio_client = get_minio_client()
     
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    uploads = []
     
     try:
         logger.info("Starting comprehensive Blockstream data collection")
         
-        logger.info("Collecting mempool data...")
-        mempool_data = get_mempool_info(access_token)
-        save_to_minio(mempool_data, f"mempool/mempool_{timestamp}.json", minio_client)
-        
-        logger.info("Collecting fee estimates...")
-        fee_data = get_fee_estimates(access_token)
-        save_to_minio(fee_data, f"fees/fee_estimates_{timestamp}.json", minio_client)
-        
-        logger.info("Collecting current block height...")
-        height_data = get_blocks_tip_height(access_token)
-        save_to_minio({"height": height_data, "timestamp": timestamp}, 
-                     f"blocks/current_height_{timestamp}.json", minio_client)
-        
-        logger.info("Collecting current block hash...")
-        hash_data = get_blocks_tip_hash(access_token)
-        save_to_minio({"hash": hash_data, "timestamp": timestamp}, 
-                     f"blocks/current_hash_{timestamp}.json", minio_client)
+        logger.info("Collecting mempool, fee estimate, block and mempool transaction data concurrently...")
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, 7)) as executor:
+            futures = {
+                'mempool': executor.submit(get_mempool_info, access_token, raw=True),
+                'fee_estimates': executor.submit(get_fee_estimates, access_token, raw=True),
+                'current_height': executor.submit(get_blocks_tip_height, access_token),
+                'current_hash': executor.submit(get_blocks_tip_hash, access_token),
+                'recent_blocks': executor.submit(get_recent_blocks, access_token),
+                'recent_mempool': executor.submit(get_mempool_recent, access_token, raw=True),
+                'mempool_txids': executor.submit(get_mempool_txids, access_token, max_bytes=MEMPOOL_TXIDS_MAX_BYTES)
+            }
         
-        logger.info("Collecting recent blocks...")
-        blocks_data = get_recent_blocks(access_token)
-        save_to_minio(blocks_data, f"blocks/recent_blocks_{timestamp}.json", minio_client)
+        core_objects = {
+            'mempool': f"mempool/mempool_{timestamp}.json",
+            'fee_estimates': f"fees/fee_estimates_{timestamp}.json",
+            'current_height': f"blocks/current_height_{timestamp}.json",
+            'current_hash': f"blocks/current_hash_{timestamp}.json",
+            'recent_blocks': f"blocks/recent_blocks_{timestamp}.json",
+            'recent_mempool': f"mempool/recent_transactions_{timestamp}.json"
+        }
+        core_data = {}
+        failed_fetches = []
         
-        logger.info("Collecting recent mempool transactions...")
-        recent_mempool = get_mempool_recent(access_token)
-        save_to_minio(recent_mempool, f"mempool/recent_transactions_{timestamp}.json", minio_client)
+        for name, object_name in core_objects.items():
+            try:
+                core_data[name] = futures[name].result()
+            except Exception as e:
+                logger.error(f"Failed to collect {name}: {e}")
+                failed_fetches.append(f"{name}: {e}")
+                continue
+            
+            if name == 'current_height':
+                uploads.append(({"height": core_data[name], "timestamp": timestamp}, object_name))
+            elif name == 'current_hash':
+                uploads.append(({"hash": core_data[name], "timestamp": timestamp}, object_name))
+            else:
+                uploads.append((core_data[name], object_name))
         
-        logger.info("Collecting mempool transaction IDs...")
         try:
-            mempool_txids = get_mempool_txids(access_token)
-            if isinstance(mempool_txids, list) and len(mempool_txids) < 10000:
-                save_to_minio(mempool_txids, f"mempool/txids_{timestamp}.json", minio_client)
-            else:
+            mempool_txids = futures['mempool_txids'].result()
+            if isinstance(mempool_txids, list) and len(mempool_txids) < MEMPOOL_TXIDS_MAX_ITEMS:
+                uploads.append((mempool_txids, f"mempool/txids_{timestamp}.json"))
+            elif mempool_txids is not None:
                 logger.info(f"Skipping mempool txids - too large ({len(mempool_txids) if isinstance(mempool_txids, list) else 'unknown'} items)")
         except Exception as e:
             logger.warning(f"Failed to collect mempool txids: {e}")
         
+        if failed_fetches:
+            raise RuntimeError(f"Failed to collect core data: {'; '.join(failed_fetches)}")
+        
+        blocks_data = core_data['recent_blocks']
         if blocks_data and isinstance(blocks_data, list) and len(blocks_data) > 0:
             latest_block = blocks_data[0]
             latest_block_id = latest_block.get('id')
             if latest_block_id:
                 logger.info(f"Collecting detailed data for latest block: {latest_block_id}")
+                with ThreadPoolExecutor(max_workers=3) as executor:
+                    header_future = executor.submit(get_block_header, latest_block_id, access_token)
+                    status_future = executor.submit(get_block_status, latest_block_id, access_token, raw=True)
+                    txs_future = executor.submit(get_block_txs, latest_block_id, access_token, raw=True)
+                
                 try:
-                    block_header = get_block_header(latest_block_id, access_token)
-                    save_to_minio({"header": block_header, "block_id": latest_block_id}, 
-                                 f"blocks/block_header_{latest_block_id}_{timestamp}.json", minio_client)
+                    block_header = header_future.result()
+                    uploads.append(({"header": block_header, "block_id": latest_block_id}, 
+                                    f"blocks/block_header_{latest_block_id}_{timestamp}.json"))
                 except Exception as e:
                     logger.warning(f"Failed to get block header: {e}")
                 
                 try:
-                    block_status = get_block_status(latest_block_id, access_token)
-                    save_to_minio(block_status, 
-                                 f"blocks/block_status_{latest_block_id}_{timestamp}.json", minio_client)
+                    block_status = status_future.result()
+                    uploads.append((block_status, 
+                                    f"blocks/block_status_{latest_block_id}_{timestamp}.json"))
                 except Exception as e:
                     logger.warning(f"Failed to get block status: {e}")
                 
                 try:
-                    block_txs = get_block_txs(latest_block_id, access_token)
-                    save_to_minio(block_txs, 
-                                 f"blocks/block_transactions_{latest_block_id}_{timestamp}.json", minio_client)
+                    block_txs = txs_future.result()
+                    uploads.append((block_txs, 
+                                    f"blocks/block_transactions_{latest_block_id}_{timestamp}.json"))
                 except Exception as e:
                     logger.warning(f"Failed to get block transactions: {e}")
         
+        results = save_many_to_minio(uploads, minio_client)
+        failed_saves = results.count(False)
+        if failed_saves:
+            logger.warning(f"{failed_saves} of {len(uploads)} objects failed to save to MinIO")
+        
         summary = {
             "collection_timestamp": timestamp,
             "data_types_collected": [
@@ -352,6 +511,9 @@ def collect_and_store_blockstream_data(access_token, minio_client=None):
         
     except Exception as e:
         logger.error(f"Failed to collect and store data: {e}")
+        if uploads:
+            logger.info(f"Saving {len(uploads)} objects collected before the failure")
+            save_many_to_minio(uploads, minio_client)
         error_summary = {
             "collection_timestamp": timestamp,
             "collection_status": "failed",
@@ -365,7 +527,7 @@ def main():
         logger.info("Starting Blockstream data collection for MinIO storage")
    
         logger.info("Initializing MinIO connection...")
-        minio_client = initialize_minio()
+        minio_client = get_minio_client()
         
         logger.info("Authenticating with Blockstream API...")
         access_token = authenticate()
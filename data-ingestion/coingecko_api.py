@@ -6,6 +6,8 @@ import time
 import io
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from minio import Minio
 from minio.error import S3Error
 
@@ -29,7 +31,29 @@ API_RATE_LIMIT_SECONDS = float(os.getenv('COINGECKO_RATE_LIMIT', '1.2'))
 BATCH_DELAY_SECONDS = float(os.getenv('COINGECKO_BATCH_DELAY', '10'))   
 BATCH_SIZE = int(os.getenv('COINGECKO_BATCH_SIZE', '50'))              
 
+HTTP_TIMEOUT = (3.05, 30)
+
+def create_session():
+    session = requests.Session()
+    retries = Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=[429, 500, 502, 503, 504]
+    )
+    adapter = HTTPAdapter(max_retries=retries)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+SESSION = create_session()
+
+_MINIO_CLIENT = None
+
 def get_minio_client():
+    global _MINIO_CLIENT
+    if _MINIO_CLIENT is not None:
+        return _MINIO_CLIENT
+    
     if not MINIO_ACCESS_KEY or not MINIO_SECRET_KEY:
         logger.error("MinIO credentials not found. Please set MINIO_ACCESS_KEY and MINIO_SECRET_KEY")
         raise ValueError("MinIO credentials required")
@@ -51,6 +75,7 @@ def get_minio_client():
         logger.error(f"Failed to create/access MinIO bucket: {e}")
         raise
     
+    _MINIO_CLIENT = client
     return client
 
 def upload_batch_to_minio(batch_data, first_date, last_date):
@@ -153,7 +178,7 @@ def fetch_data(endpoint, additional_params=None):
         logger.debug(f"Rate limiting: Waiting {API_RATE_LIMIT_SECONDS} seconds before request")
         time.sleep(API_RATE_LIMIT_SECONDS)
         
-        response = requests.get(url, params=params)
+        response = SESSION.get(url, params=params, timeout=HTTP_TIMEOUT)
         response.raise_for_status()
         
         data = response.json()
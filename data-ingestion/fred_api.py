@@ -5,6 +5,8 @@ import json
 import io
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from minio import Minio
 from minio.error import S3Error
 
@@ -24,7 +26,29 @@ MINIO_ACCESS_KEY = os.getenv('MINIO_ACCESS_KEY')
 MINIO_SECRET_KEY = os.getenv('MINIO_SECRET_KEY')
 MINIO_BUCKET = os.getenv('MINIO_BUCKET', 'fred-data')
 
+HTTP_TIMEOUT = (3.05, 30)
+
+def create_session():
+    session = requests.Session()
+    retries = Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=[429, 500, 502, 503, 504]
+    )
+    adapter = HTTPAdapter(max_retries=retries)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+SESSION = create_session()
+
+_MINIO_CLIENT = None
+
 def get_minio_client():
+    global _MINIO_CLIENT
+    if _MINIO_CLIENT is not None:
+        return _MINIO_CLIENT
+    
     if not MINIO_ACCESS_KEY or not MINIO_SECRET_KEY:
         logger.error("MinIO credentials not found. Please set MINIO_ACCESS_KEY and MINIO_SECRET_KEY")
         raise ValueError("MinIO credentials required")
@@ -46,6 +70,7 @@ def get_minio_client():
         logger.error(f"Failed to create/access MinIO bucket: {e}")
         raise
     
+    _MINIO_CLIENT = client
     return client
 
 def upload_to_minio(data, object_name):
@@ -146,7 +171,7 @@ def fetch_data(endpoint, additional_params=None):
             params.update(additional_params)
             
         logger.debug(f"Making request to {url} with params: {list(params.keys())}")
-        response = requests.get(url, params=params)
+        response = SESSION.get(url, params=params, timeout=HTTP_TIMEOUT)
         response.raise_for_status()
         
         data = response.json()